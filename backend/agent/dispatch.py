@@ -3,35 +3,61 @@ Tool dispatcher for the airline booking agent.
 
 Routes tool_use blocks from the Anthropic API to the correct implementation
 in tools_impl.py.
+
+The tool implementations are synchronous (file I/O, FAISS search, MCP email
+bridge), so each call is offloaded to a worker thread. This lets the executor
+run several tool calls from one assistant turn concurrently without blocking
+the event loop.
+
+Tool inputs are filtered to the implementation's parameters before the call:
+the input schemas don't forbid extra properties, and the model sometimes sends
+fields the tool doesn't take (e.g. departure_date for flight_search).
 """
 
+import asyncio
+import inspect
 import logging
+from collections.abc import Callable
 
 from agent.tools_impl import _flight_search, _rag_lookup, _send_email
 
 logger = logging.getLogger(__name__)
 
+# Tool name → implementation. Each implementation's keyword arguments match the
+# property names of its input_schema in agent/tools.py, and optional fields
+# carry their defaults in the function signature.
+_DISPATCH: dict[str, Callable[..., str]] = {
+    "flight_search": _flight_search,
+    "rag_lookup": _rag_lookup,
+    "send_email": _send_email,
+}
+
+# Tool name → implementation signature, for filtering and checking inputs
+_SIGNATURES: dict[str, inspect.Signature] = {
+    name: inspect.signature(fn) for name, fn in _DISPATCH.items()
+}
 
-def dispatch_tool(tool_name: str, tool_input: dict) -> str:
+
+async def dispatch_tool(tool_name: str, tool_input: dict) -> str:
     """Route a tool_use block to the correct implementation."""
-    if tool_name == "flight_search":
-        return _flight_search(
-            origin=tool_input["origin"],
-            destination=tool_input["destination"],
-            cabin_class=tool_input.get("cabin_class", "Economy"),
-            airline_preference=tool_input.get("airline_preference"),
-        )
-    elif tool_name == "rag_lookup":
-        return _rag_lookup(
-            question=tool_input["question"],
-            airline=tool_input.get("airline"),
-        )
-    elif tool_name == "send_email":
-        return _send_email(
-            to=tool_input["to"],
-            subject=tool_input["subject"],
-            body_html=tool_input["body_html"],
-        )
-    else:
+    fn = _DISPATCH.get(tool_name)
+    if fn is None:
         logger.warning("Unknown tool called: %s", tool_name)
         return f"Unknown tool: {tool_name}"
+
+    signature = _SIGNATURES[tool_name]
+    kwargs = {k: v for k, v in tool_input.items() if k in signature.parameters}
+    if len(kwargs) < len(tool_input):
+        logger.info(
+            "Ignoring unexpected %s input fields: %s",
+            tool_name, sorted(tool_input.keys() - kwargs.keys()),
+        )
+    try:
+        signature.bind(**kwargs)
+    except TypeError as exc:
+        # e.g. a required field is missing — report it back to the model as
+        # the tool result rather than failing the whole turn
+        logger.warning("Invalid %s input %s: %s", tool_name, tool_input, exc)
+        return f"Invalid input for {tool_name}: {exc}"
+
+    return await asyncio.to_thread(fn, **kwargs)
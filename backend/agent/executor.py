@@ -1,22 +1,31 @@
 """
 Agent executor — Anthropic tool-use agentic loop.
 
-Exposes run_agent() which is called by main.py for every /api/chat request.
+Exposes:
+    stream_agent() — async generator used by /api/chat/stream; yields text
+                     deltas as Claude generates them, a "tool_start" event
+                     before each round of tool calls, then a final "done" event
+    run_agent()    — used by /api/chat; drains stream_agent() and returns
+                     (reply, reasoning)
 
 Flow per turn:
     1. Build messages list from history + new user message
-    2. Call Claude with system prompt and tool schemas
-    3. If stop_reason == "tool_use": dispatch each tool, append tool_results, loop
-    4. If stop_reason == "end_turn": extract final text, return (reply, reasoning)
+    2. Stream Claude's response with system prompt and tool schemas,
+       forwarding text deltas as they arrive
+    3. If stop_reason == "tool_use": dispatch all tools concurrently, append
+       tool_results (in the original block order), loop
+    4. If stop_reason == "end_turn": extract final text, emit (reply, reasoning)
 
 Tool implementations live in agent/tools_impl.py.
 Tool routing lives in agent/dispatch.py.
 """
 
-import json
+import asyncio
 import logging
+from collections.abc import AsyncIterator
 
 import anthropic
+import orjson
 
 from agent.dispatch import dispatch_tool
 from agent.system_prompt import SYSTEM_PROMPT
@@ -28,24 +37,86 @@ logger = logging.getLogger(__name__)
 # Constants
 # ---------------------------------------------------------------------------
 MODEL = "claude-haiku-4-5-20251001"
+# Model for the first call of each turn — intent extraction, clarifying
+# questions, and choosing tools. Once tool results are in context, MODEL
+# synthesises the answer from them. Haiku 4.5 is already the smallest current
+# model, so both default to it; point MODEL_FAST at a cheaper model to split
+# the work. Note that prompt caches are per model, so a split trades some
+# cache hits for the cheaper planning calls.
+MODEL_FAST = MODEL
 MAX_TOKENS = 4096
+# Upper bound on model calls per user message, so a model that keeps
+# requesting tools cannot loop (and bill) indefinitely
+MAX_ITERATIONS = 8
 
 # Truncation limits for reasoning trace entries
 REASONING_TEXT_LIMIT = 500
 REASONING_TOOL_LIMIT = 300
 
+# ---------------------------------------------------------------------------
+# Prompt caching — the system prompt and tool schemas are identical on every
+# call, so cache breakpoints after them let the API reuse the encoded prefix
+# across loop iterations and requests. Prefixes below the model's minimum
+# cacheable length are simply processed uncached.
+# ---------------------------------------------------------------------------
+_EPHEMERAL: dict = {"type": "ephemeral"}   # shared, never mutated
+_SYSTEM: list[dict] = [
+    {"type": "text", "text": SYSTEM_PROMPT, "cache_control": _EPHEMERAL},
+]
+_TOOLS: list[dict] = TOOLS[:-1] + [{**TOOLS[-1], "cache_control": _EPHEMERAL}]
+
 # ---------------------------------------------------------------------------
 # Anthropic client — initialised once at module import
 # (reads ANTHROPIC_API_KEY from environment, loaded by main.py via dotenv)
 # ---------------------------------------------------------------------------
-_client = anthropic.Anthropic()
+_client = anthropic.AsyncAnthropic()
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _trunc(text: str, limit: int) -> str:
+    """Truncate text to `limit` characters with an ellipsis; short text is returned as-is."""
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+def _first_text(content: list) -> str:
+    """Return the first text block's text from a response, or "" if there is none."""
+    for block in content:
+        if block.type == "text":
+            return block.text
+    return ""
+
+
+def _to_content_params(content: list) -> list[dict]:
+    """
+    Convert SDK response content blocks into minimal request-param dicts.
+
+    Appending the SDK objects themselves makes the client re-serialise every
+    field of every prior block on each loop iteration; plain dicts carrying
+    only what the API needs are cheaper to send and are built exactly once.
+    """
+    params: list[dict] = []
+    for block in content:
+        if block.type == "text":
+            if block.text:     # the API rejects empty text blocks
+                params.append({"type": "text", "text": block.text})
+        elif block.type == "tool_use":
+            params.append({
+                "type": "tool_use",
+                "id": block.id,
+                "name": block.name,
+                "input": block.input,
+            })
+    return params
 
 
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
 
-def run_agent(message: str, history: list[dict]) -> tuple[str, list[str]]:
+async def run_agent(message: str, history: list[dict]) -> tuple[str, list[str]]:
     """
     Process a user message through the Anthropic tool-use agentic loop.
 
@@ -59,65 +130,102 @@ def run_agent(message: str, history: list[dict]) -> tuple[str, list[str]]:
             reply     — the agent's final text response (shown in chat)
             reasoning — list of step strings for the reasoning panel (hidden by default)
     """
+    async for event in stream_agent(message, history):
+        if event["type"] == "done":
+            return event["reply"], event["reasoning"]
+    raise RuntimeError("stream_agent finished without a done event")
+
+
+async def stream_agent(message: str, history: list[dict]) -> AsyncIterator[dict]:
+    """
+    Streaming variant of run_agent().
+
+    Takes the same arguments and yields event dicts:
+        {"type": "text", "text": <delta>}   — as Claude generates text, on
+                                              every loop iteration
+        {"type": "tool_start"}              — before each round of tool calls;
+                                              text streamed so far was a
+                                              preamble, not part of the reply
+        {"type": "done", "reply": <str>, "reasoning": [<str>, ...]}
+                                            — exactly once, last
+    """
     reasoning: list[str] = []
 
     # Build the messages list from the full history (main.py has already appended
     # the new user message as the last entry before calling run_agent).
     messages = list(history)
 
-    # Agentic loop — continues until Claude returns stop_reason == "end_turn"
-    while True:
-        response = _client.messages.create(
-            model=MODEL,
+    # The tool_result block currently carrying the conversation cache breakpoint
+    cached_block: dict | None = None
+    # Whether any tool results have been added to this turn's messages yet
+    has_tool_results = False
+
+    # Agentic loop — continues until Claude returns stop_reason == "end_turn",
+    # bounded by MAX_ITERATIONS
+    for _ in range(MAX_ITERATIONS):
+        # Planning call until tool results arrive, then the synthesis model
+        model = MODEL if has_tool_results else MODEL_FAST
+        async with _client.messages.stream(
+            model=model,
             max_tokens=MAX_TOKENS,
-            system=SYSTEM_PROMPT,
-            tools=TOOLS,
+            system=_SYSTEM,
+            tools=_TOOLS,
             messages=messages,
-        )
+        ) as stream:
+            # Forward text as it is generated rather than after the full reply
+            async for text in stream.text_stream:
+                yield {"type": "text", "text": text}
+            # Recover the structured content array (text + tool_use blocks)
+            response = await stream.get_final_message()
 
         # ----------------------------------------------------------------
         # Capture assistant turn in reasoning trace
         # ----------------------------------------------------------------
         for block in response.content:
             if block.type == "text":
-                reasoning.append(
-                    f"[assistant] {block.text[:REASONING_TEXT_LIMIT]}"
-                    + ("…" if len(block.text) > REASONING_TEXT_LIMIT else "")
-                )
+                reasoning.append(f"[assistant] {_trunc(block.text, REASONING_TEXT_LIMIT)}")
             elif block.type == "tool_use":
                 reasoning.append(
-                    f"[tool_call] {block.name}({json.dumps(block.input, ensure_ascii=False)})"
+                    f"[tool_call] {block.name}({orjson.dumps(block.input).decode()})"
                 )
 
         # ----------------------------------------------------------------
         # Terminal: model has finished responding
         # ----------------------------------------------------------------
         if response.stop_reason == "end_turn":
-            # Extract the final text reply from the last assistant message
-            final_text = ""
-            for block in response.content:
-                if block.type == "text":
-                    final_text = block.text
-                    break
-            return final_text, reasoning
+            yield {"type": "done", "reply": _first_text(response.content), "reasoning": reasoning}
+            return
 
         # ----------------------------------------------------------------
         # Tool use: dispatch each tool call and collect results
         # ----------------------------------------------------------------
         if response.stop_reason == "tool_use":
+            calls = [block for block in response.content if block.type == "tool_use"]
+            if not calls:
+                # Nothing to dispatch — return whatever text the model produced
+                # rather than calling it again with an empty tool_result turn
+                logger.warning("stop_reason tool_use without tool_use blocks")
+                yield {"type": "done", "reply": _first_text(response.content), "reasoning": reasoning}
+                return
+
             # Append the full assistant message (may contain text + tool_use blocks)
-            messages.append({"role": "assistant", "content": response.content})
+            messages.append({"role": "assistant", "content": _to_content_params(response.content)})
 
-            # Build tool_result blocks for every tool_use in this response
-            tool_results = []
-            for block in response.content:
-                if block.type != "tool_use":
-                    continue
+            # Mark the iteration boundary: the final reply comes from the next
+            # call(s), so any text streamed so far is superseded
+            yield {"type": "tool_start"}
+
+            # Run every tool_use in this response concurrently — total tool time
+            # is the slowest call rather than the sum of all calls
+            outputs = await asyncio.gather(
+                *(dispatch_tool(block.name, block.input) for block in calls)
+            )
 
-                tool_output = dispatch_tool(block.name, block.input)
+            # Build tool_result blocks in the same order as the tool_use blocks
+            tool_results = []
+            for block, tool_output in zip(calls, outputs):
                 reasoning.append(
-                    f"[tool_result] {block.name} → {tool_output[:REASONING_TOOL_LIMIT]}"
-                    + ("…" if len(tool_output) > REASONING_TOOL_LIMIT else "")
+                    f"[tool_result] {block.name} → {_trunc(tool_output, REASONING_TOOL_LIMIT)}"
                 )
 
                 tool_results.append({
@@ -126,8 +234,17 @@ def run_agent(message: str, history: list[dict]) -> tuple[str, list[str]]:
                     "content": tool_output,
                 })
 
+            # Move the conversation cache breakpoint to the newest tool_result so
+            # the next iteration reads the whole prior exchange from cache. Only
+            # one breakpoint is kept in messages (the API allows four in total).
+            if cached_block is not None:
+                cached_block.pop("cache_control", None)
+            cached_block = tool_results[-1]
+            cached_block["cache_control"] = _EPHEMERAL
+
             # Append the tool results as a user turn (Anthropic API convention)
             messages.append({"role": "user", "content": tool_results})
+            has_tool_results = True
             # Loop: call Claude again with the tool results in context
             continue
 
@@ -135,7 +252,19 @@ def run_agent(message: str, history: list[dict]) -> tuple[str, list[str]]:
         # Unexpected stop reason — surface it rather than silently failing
         # ----------------------------------------------------------------
         logger.warning("Unexpected stop_reason: %s", response.stop_reason)
-        return (
-            "I encountered an unexpected issue. Please try again.",
-            reasoning + [f"[error] Unexpected stop_reason: {response.stop_reason}"],
-        )
+        yield {
+            "type": "done",
+            "reply": "I encountered an unexpected issue. Please try again.",
+            "reasoning": reasoning + [f"[error] Unexpected stop_reason: {response.stop_reason}"],
+        }
+        return
+
+    # ----------------------------------------------------------------
+    # Iteration cap reached while the model was still calling tools
+    # ----------------------------------------------------------------
+    logger.warning("Agent loop hit MAX_ITERATIONS (%d)", MAX_ITERATIONS)
+    yield {
+        "type": "done",
+        "reply": "I wasn't able to finish that request. Please try again or rephrase.",
+        "reasoning": reasoning + [f"[error] Max iterations ({MAX_ITERATIONS}) exceeded"],
+    }
@@ -87,6 +87,8 @@ TOOLS: list[dict] = [
         "name": "send_email",
         "description": (
             "Send a formatted HTML email containing flight details to the user. "
+            "The email is delivered in the background; the tool returns as soon "
+            "as it is queued. "
             "ONLY call this tool after the user has given explicit confirmation. "
             "Never send speculatively."
         ),
@@ -2,21 +2,28 @@
 Tool implementations for the airline booking agent.
 
 Each function maps 1-to-1 to a tool schema in agent/tools.py:
-  - _flight_search()      filters backend/data/mock_flights.json
+  - _flight_search()      route-index lookup over backend/data/mock_flights.json
   - _rag_lookup()         calls rag.retriever.query_policy()
-  - _send_email_async()   async MCP call via Zapier Gmail
-  - _send_email()         sync bridge for use in the agentic loop
+  - _send_email_async()   async MCP call via Zapier Gmail (persistent session)
+  - _send_email()         queues _send_email_async() on a background event loop
 """
 
 import asyncio
-import json
 import logging
 import os
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+from datetime import timedelta
 from pathlib import Path
 
-import anthropic  # noqa: F401 — keep for type consistency across agent package
+import anyio
+import httpx
+import numpy as np
+import orjson
 from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
 
 from agent.email_template import build_email_html
 from rag.retriever import query_policy
@@ -26,28 +33,112 @@ logger = logging.getLogger(__name__)
 MOCK_FLIGHTS_PATH = Path(__file__).parent.parent / "data" / "mock_flights.json"
 
 # ---------------------------------------------------------------------------
-# Flights cache — loaded once on first call, reused on subsequent calls
+# Flights cache — loaded once on first call, reused on subsequent calls.
+# _load_flights() also builds the lookup structures below in the same single
+# pass, so _flight_search does no per-row string work: it resolves both
+# locations with _token_to_iata, fetches the route's flight indices from
+# _flights_by_route, and only scans those candidates for the airline filter.
 # ---------------------------------------------------------------------------
 _flights: list[dict] | None = None
 
+# Location token → IATA codes, built alongside the cache. Both the casefolded
+# airport code ("khi") and city name ("karachi") resolve to the code ("KHI"); a
+# city served by several airports in the catalogue maps to all of them.
+_token_to_iata: dict[str, tuple[str, ...]] = {}
+
+# Route index: (origin IATA, destination IATA, cabin_class casefolded) →
+# indices into _flights, in catalogue order.
+_flights_by_route: dict[tuple[str, str, str], list[int]] = {}
+
+# Airline codebook: distinct casefolded airline names, where a flight's airline
+# code is the position of its name here. Codes are kept per flight both as a
+# list (small candidate sets) and as an int32 array (large ones).
+_airline_names: list[str] = []
+_airline_codes: list[int] = []
+_airline_codes_arr: np.ndarray = np.array([], dtype=np.int32)
+
+# Display arrival time per flight, with the " (+1)" suffix already applied
+# when the flight lands the next day (date_offset == 1).
+_arrival_strs: list[str] = []
+
+# Markdown table row per flight, rendered once at load time from _ROW_FMT.
+# Every field is static, so a search only joins the rows it returns.
+_md_rows: list[str] = []
+
+# Candidate-set size from which the airline filter switches from a Python
+# comprehension to one vectorised np.isin() over the candidates. Below
+# this, NumPy's per-call overhead outweighs the per-row savings.
+_VECTORIZE_MIN_CANDIDATES = 256
+
 
 def _load_flights() -> list[dict] | None:
-    """Load mock flights from disk once and cache in module-level variable."""
-    global _flights
+    """Load mock flights from disk once and cache in module-level variables."""
+    global _flights, _token_to_iata, _flights_by_route
+    global _airline_names, _airline_codes, _airline_codes_arr
+    global _arrival_strs, _md_rows
     if _flights is not None:
         return _flights
     try:
-        _flights = json.loads(MOCK_FLIGHTS_PATH.read_text(encoding="utf-8"))["flights"]
-        return _flights
-    except (FileNotFoundError, json.JSONDecodeError):
+        flights = orjson.loads(MOCK_FLIGHTS_PATH.read_bytes())["flights"]
+    except (FileNotFoundError, orjson.JSONDecodeError):
         logger.exception("Failed to load mock_flights.json from %s", MOCK_FLIGHTS_PATH)
         return None
 
+    tokens: defaultdict[str, set[str]] = defaultdict(set)
+    by_route: defaultdict[tuple[str, str, str], list[int]] = defaultdict(list)
+    for i, f in enumerate(flights):
+        for code_field, city_field in (("origin", "origin_city"), ("destination", "destination_city")):
+            tokens[f[code_field].casefold()].add(f[code_field])
+            tokens[f[city_field].casefold()].add(f[code_field])
+        by_route[(f["origin"], f["destination"], f["cabin_class"].casefold())].append(i)
+
+    _token_to_iata = {token: tuple(sorted(codes)) for token, codes in tokens.items()}
+    _flights_by_route = dict(by_route)
+    codebook: dict[str, int] = {}
+    _airline_codes = [codebook.setdefault(f["airline"].casefold(), len(codebook)) for f in flights]
+    _airline_names = list(codebook)
+    _airline_codes_arr = np.array(_airline_codes, dtype=np.int32)
+    _arrival_strs = [
+        f"{f['arrival_time']} (+1)" if f.get("date_offset", 0) == 1 else f["arrival_time"]
+        for f in flights
+    ]
+    _md_rows = [_ROW_FMT.format(_arrival=arrival, **f) for f, arrival in zip(flights, _arrival_strs)]
+    _flights = flights
+    return _flights
+
 
 # ---------------------------------------------------------------------------
 # Tool: flight_search
 # ---------------------------------------------------------------------------
 
+# Markdown results table. _ROW_FMT is filled once per flight by _load_flights()
+# from the flight dict plus its _arrival_strs entry as the `_arrival` field.
+_TABLE_HEADER = (
+    "| Airline | Flight | Departure | Arrival | Duration | Stops | Price (USD) |",
+    "|---------|--------|-----------|---------|----------|-------|-------------|",
+)
+_ROW_FMT = (
+    "| {airline} | {flight_number} | {departure_time} "
+    "| {_arrival} | {duration} | {stops} | ${price_usd} |"
+)
+
+
+def _no_flights_message(
+    origin: str,
+    destination: str,
+    cabin_class: str,
+    airline_preference: str | None,
+) -> str:
+    """Build the reply for a flight search with no matching results."""
+    return (
+        f"No flights found from **{origin}** to **{destination}** "
+        f"in {cabin_class} class"
+        + (f" with {airline_preference}" if airline_preference else "")
+        + ". The mock dataset covers: JFK↔LHR, DXB↔LHR, KHI↔DXB, "
+        "LHE↔LHR, ISB↔JED, JFK↔YYZ."
+    )
+
+
 def _flight_search(
     origin: str,
     destination: str,
@@ -58,8 +149,9 @@ def _flight_search(
     Filter mock_flights.json and return a markdown table of matching flights.
 
     Matching logic:
-      - origin and destination matched case-insensitively against both the
-        IATA code field (e.g. "KHI") and the city name field (e.g. "Karachi")
+      - origin and destination matched case-insensitively (casefold) against
+        both the IATA code field (e.g. "KHI") and the city name field
+        (e.g. "Karachi")
       - cabin_class matched case-insensitively (default Economy)
       - airline_preference optionally filters by partial airline name match
 
@@ -69,60 +161,53 @@ def _flight_search(
     if flights is None:
         return "Flight data is temporarily unavailable."
 
-    origin_lower = origin.strip().lower()
-    dest_lower = destination.strip().lower()
-    cabin_lower = cabin_class.strip().lower() if cabin_class else "economy"
-    airline_lower = airline_preference.strip().lower() if airline_preference else None
-
-    results = []
-    for f in flights:
-        # Origin match: IATA code or city name
-        origin_match = (
-            f["origin"].lower() == origin_lower
-            or f["origin_city"].lower() == origin_lower
-        )
-        # Destination match: IATA code or city name
-        dest_match = (
-            f["destination"].lower() == dest_lower
-            or f["destination_city"].lower() == dest_lower
-        )
-        # Cabin class match
-        cabin_match = f["cabin_class"].lower() == cabin_lower
-        # Airline preference (partial match)
-        airline_match = (
-            airline_lower is None
-            or airline_lower in f["airline"].lower()
-        )
-
-        if origin_match and dest_match and cabin_match and airline_match:
-            results.append(f)
-
-    if not results:
-        return (
-            f"No flights found from **{origin}** to **{destination}** "
-            f"in {cabin_class} class"
-            + (f" with {airline_preference}" if airline_preference else "")
-            + ". The mock dataset covers: JFK↔LHR, DXB↔LHR, KHI↔DXB, "
-            "LHE↔LHR, ISB↔JED, JFK↔YYZ."
-        )
-
-    # Build markdown table (up to 5 results)
-    rows = results[:5]
-    lines = [
-        "| Airline | Flight | Departure | Arrival | Duration | Stops | Price (USD) |",
-        "|---------|--------|-----------|---------|----------|-------|-------------|",
-    ]
-    for r in rows:
-        arrival_note = f"{r['arrival_time']} (+1)" if r.get("date_offset", 0) == 1 else r["arrival_time"]
-        lines.append(
-            f"| {r['airline']} | {r['flight_number']} | {r['departure_time']} "
-            f"| {arrival_note} | {r['duration']} | {r['stops']} | ${r['price_usd']} |"
+    # Casefold once per call; the index keys were casefolded at load time
+    origin_key = origin.strip().casefold()
+    dest_key = destination.strip().casefold()
+    cabin_key = cabin_class.strip().casefold() if cabin_class else "economy"
+    airline_key = airline_preference.strip().casefold() if airline_preference else None
+
+    # Resolve origin/destination to IATA codes, then look up the route index.
+    # Unknown locations resolve to () and fall straight through to "no flights".
+    origin_codes = _token_to_iata.get(origin_key, ())
+    dest_codes = _token_to_iata.get(dest_key, ())
+    if len(origin_codes) == 1 and len(dest_codes) == 1:
+        candidates = _flights_by_route.get((origin_codes[0], dest_codes[0], cabin_key), [])
+    else:
+        # Multi-airport city: merge the routes back into catalogue order
+        candidates = sorted(
+            i
+            for o in origin_codes
+            for d in dest_codes
+            for i in _flights_by_route.get((o, d, cabin_key), [])
         )
 
-    first = results[0]
+    if not candidates:
+        return _no_flights_message(origin, destination, cabin_class, airline_preference)
+
+    if airline_key is None:
+        # No filter to apply — only the rows that will be rendered are kept
+        selected = candidates[:5]
+    else:
+        # Substring-match the preference against each distinct airline once,
+        # then filter the route's candidates by integer airline code
+        wanted = {code for code, name in enumerate(_airline_names) if airline_key in name}
+        if len(candidates) >= _VECTORIZE_MIN_CANDIDATES:
+            cand = np.asarray(candidates)
+            matched = cand[np.isin(_airline_codes_arr[cand], list(wanted))]
+            selected = matched[:5].tolist()
+        else:
+            selected = [i for i in candidates if _airline_codes[i] in wanted][:5]
+        if not selected:
+            return _no_flights_message(origin, destination, cabin_class, airline_preference)
+
+    # Build markdown table (up to 5 results) from the pre-rendered rows
+    table = "\n".join([*_TABLE_HEADER, *(_md_rows[i] for i in selected)])
+
+    first = flights[selected[0]]
     route_str = f"{first['origin_city']} ({first['origin']}) → {first['destination_city']} ({first['destination']})"
-    header = f"Found **{len(rows)}** flight(s) for {route_str} · {cabin_class} class:\n\n"
-    return header + "\n".join(lines)
+    header = f"Found **{len(selected)}** flight(s) for {route_str} · {cabin_class} class:\n\n"
+    return header + table
 
 
 # ---------------------------------------------------------------------------
@@ -135,6 +220,7 @@ def _rag_lookup(question: str, airline: str | None = None) -> str:
 
     Retrieves top-3 chunks. If `airline` is provided, it is appended to the
     question to bias the embedding search toward that airline's chunks.
+    Repeated queries are served from query_policy()'s result cache.
     """
     # Bias the query toward the specified airline if provided
     query = f"{airline} {question}" if airline else question
@@ -146,12 +232,10 @@ def _rag_lookup(question: str, airline: str | None = None) -> str:
 
     parts = []
     for i, chunk in enumerate(chunks, 1):
-        airline_label = chunk.get("airline", "unknown").replace("_", " ").title()
-        policy_label = chunk.get("policy_type", "general").replace("_", " ").title()
-        cabin_label = chunk.get("cabin_class", "all").replace("_", " ").title()
+        # Display labels are precomputed at ingest time
         parts.append(
-            f"**[Source {i} — {airline_label} · {policy_label}"
-            + (f" · {cabin_label}" if cabin_label != "All" else "")
+            f"**[Source {i} — {chunk['airline_label']} · {chunk['policy_type_label']}"
+            + (f" · {chunk['cabin_class_label']}" if chunk["cabin_class"] != "all" else "")
             + f" (score: {chunk['score']})]**\n{chunk['text']}"
         )
 
@@ -162,34 +246,212 @@ def _rag_lookup(question: str, airline: str | None = None) -> str:
 # Tool: send_email
 # ---------------------------------------------------------------------------
 
+# Upper bound on opening the Zapier session (HTTP connect + MCP initialize),
+# and on each MCP request once it is open, so an unresponsive server can't
+# hold the session lock — and every send queued behind it — indefinitely
+ZAPIER_CONNECT_TIMEOUT_SECONDS = 15.0
+ZAPIER_REQUEST_TIMEOUT_SECONDS = 60.0
+
+# Failures that mean the request never reached the server, so retrying it on a
+# fresh session cannot send the email twice. Anything else (a timeout, or an
+# error reply) may come after Zapier has already accepted the send.
+_RECONNECT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, httpx.ConnectError)
+
+# Error code the streamable-HTTP client reports when the server answers 404
+# because it has ended the session. The request was not processed, and the
+# spec requires a new session (with a fresh initialize) before continuing.
+_SESSION_TERMINATED_CODE = 32600
+
+
+def _is_undelivered(exc: Exception) -> bool:
+    """Whether a failed MCP call definitely did not reach the server's tool."""
+    if isinstance(exc, McpError):
+        return exc.error.code == _SESSION_TERMINATED_CODE
+    return isinstance(exc, _RECONNECT_ERRORS)
+
+
+class _ZapierSession:
+    """
+    Long-lived Zapier MCP ClientSession, reused across email sends.
+
+    Opening a session costs an HTTP handshake plus the MCP initialize exchange,
+    so it is done once and kept open. The MCP transports are anyio context
+    managers that must be exited by the task that entered them, so a dedicated
+    owner task holds them open until the session is closed or replaced.
+    All methods must run on the same event loop.
+    """
+
+    def __init__(self) -> None:
+        self._session: ClientSession | None = None
+        self._owner: asyncio.Task | None = None
+        self._stop: asyncio.Event | None = None
+        self._lock = asyncio.Lock()
+
+    async def call_tool(self, name: str, arguments: dict):
+        """
+        Call an MCP tool over the shared session.
+
+        If the call definitely never reached the server (connection gone, or
+        the server ended the session), it is retried once on a new session.
+        Any other failure may have happened after the server acted, so it is
+        not retried; the session is dropped and the next call reconnects.
+        """
+        session = await self._get()
+        for attempt in (1, 2):
+            try:
+                return await session.call_tool(name, arguments=arguments)
+            except Exception as exc:
+                if attempt == 1 and _is_undelivered(exc):
+                    logger.warning("Zapier MCP session lost (%r); reconnecting", exc)
+                    session = await self._get(stale=session)
+                    continue
+                logger.warning("Zapier MCP call failed (%r); dropping the session", exc)
+                await self._discard(session)
+                raise
+
+    async def connect(self) -> None:
+        """Open the session now rather than on first use."""
+        await self._get()
+
+    async def close(self) -> None:
+        """Close the session, if open."""
+        async with self._lock:
+            await self._close()
+
+    async def _discard(self, session: ClientSession) -> None:
+        """Close `session` if it is still the current one, without reconnecting."""
+        async with self._lock:
+            if self._session is session:
+                await self._close()
+
+    async def _get(self, stale: ClientSession | None = None) -> ClientSession:
+        """Return the open session, replacing it first if it is `stale`."""
+        async with self._lock:
+            if stale is not None and self._session is stale:
+                await self._close()
+            if self._session is None:
+                await self._connect()
+            return self._session
+
+    async def _connect(self) -> None:
+        zapier_url = os.environ.get("ZAPIER_MCP_URL")
+        if not zapier_url:
+            raise RuntimeError("ZAPIER_MCP_URL is not configured")
+        ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._stop = asyncio.Event()
+        self._owner = asyncio.create_task(self._hold(zapier_url, ready, self._stop))
+        try:
+            self._session = await asyncio.wait_for(ready, ZAPIER_CONNECT_TIMEOUT_SECONDS)
+        except TimeoutError:
+            # Abandon the half-open connection; the next call tries again
+            self._owner.cancel()
+            await asyncio.wait([self._owner], timeout=ZAPIER_CONNECT_TIMEOUT_SECONDS)
+            self._owner = None
+            raise TimeoutError(
+                f"Zapier MCP session did not open within {ZAPIER_CONNECT_TIMEOUT_SECONDS:g}s"
+            ) from None
+        logger.info("Zapier MCP session opened")
+
+    async def _close(self) -> None:
+        if self._owner is not None:
+            self._stop.set()
+            await self._owner
+        self._owner = self._session = None
+
+    async def _hold(self, url: str, ready: asyncio.Future, stop: asyncio.Event) -> None:
+        """Owner task: open the transports and session, then wait for `stop`."""
+        opened: ClientSession | None = None
+        try:
+            async with streamablehttp_client(url) as (read, write, _):
+                async with ClientSession(
+                    read,
+                    write,
+                    read_timeout_seconds=timedelta(seconds=ZAPIER_REQUEST_TIMEOUT_SECONDS),
+                ) as session:
+                    await session.initialize()
+                    opened = session
+                    ready.set_result(session)
+                    await stop.wait()
+        except Exception as exc:
+            if not ready.done():
+                ready.set_exception(exc)
+            else:
+                logger.warning("Zapier MCP session closed with error: %s", exc)
+        finally:
+            if not ready.done():
+                ready.cancel()
+            if opened is not None and self._session is opened:
+                # Dropped without close() — the next call reconnects
+                self._session = None
+
+
+# ---------------------------------------------------------------------------
+# Email event loop — one long-lived loop in a daemon thread runs every email
+# send and owns the Zapier session, so sends neither build a fresh loop per
+# call nor share the server's request loop
+# ---------------------------------------------------------------------------
+_email_loop = asyncio.new_event_loop()
+threading.Thread(target=_email_loop.run_forever, name="email-loop", daemon=True).start()
+
+_zapier = _ZapierSession()   # used only on _email_loop
+
+
+def open_email_session() -> None:
+    """
+    Start opening the Zapier session on the email loop, without waiting for it.
+
+    Called from the FastAPI lifespan, so startup never blocks on Zapier. A
+    send queued meanwhile waits for the connect; a connection failure is
+    logged, not raised, and the first send then retries it.
+    """
+    if not os.environ.get("ZAPIER_MCP_URL"):
+        return
+    future = asyncio.run_coroutine_threadsafe(_zapier.connect(), _email_loop)
+    future.add_done_callback(_log_connect_result)
+
+
+def _log_connect_result(future: Future) -> None:
+    """Done-callback for the startup connect."""
+    exc = future.exception()
+    if exc is not None:
+        logger.warning("Could not open Zapier MCP session at startup: %s", exc)
+
+
+async def close_email_session() -> None:
+    """Close the Zapier session. Called from the FastAPI lifespan on shutdown."""
+    try:
+        await asyncio.wait_for(
+            asyncio.wrap_future(asyncio.run_coroutine_threadsafe(_zapier.close(), _email_loop)),
+            ZAPIER_CONNECT_TIMEOUT_SECONDS,
+        )
+    except TimeoutError:
+        logger.warning("Timed out closing the Zapier MCP session")
+
+
 async def _send_email_async(to: str, subject: str, body_html: str) -> str:
     """
     Send an email via the Zapier MCP gmail_send_email tool.
 
-    Connects to the Zapier MCP server (URL from ZAPIER_MCP_URL env var),
-    calls gmail_send_email with the HTML body, and returns a status string.
+    Calls gmail_send_email with the HTML body over the persistent Zapier MCP
+    session (URL from ZAPIER_MCP_URL env var) and returns a status string.
     """
-    zapier_url = os.environ.get("ZAPIER_MCP_URL")
-    if not zapier_url:
+    if not os.environ.get("ZAPIER_MCP_URL"):
         return "Email could not be sent: ZAPIER_MCP_URL is not configured."
 
     # Wrap body_html in the full HTML email template
     full_html = build_email_html(subject, body_html)
 
     try:
-        async with streamablehttp_client(zapier_url) as (read, write, _):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                result = await session.call_tool(
-                    "gmail_send_email",
-                    arguments={
-                        "instructions": f"Send an email to {to} with subject '{subject}'",
-                        "to": [to],
-                        "subject": subject,
-                        "body": full_html,
-                        "body_type": "html",
-                    },
-                )
+        await _zapier.call_tool(
+            "gmail_send_email",
+            {
+                "instructions": f"Send an email to {to} with subject '{subject}'",
+                "to": [to],
+                "subject": subject,
+                "body": full_html,
+                "body_type": "html",
+            },
+        )
         logger.info("gmail_send_email succeeded | to=%s | subject=%s", to, subject)
         return f"Email successfully sent to **{to}** with subject: \"{subject}\"."
     except Exception as exc:
@@ -199,9 +461,25 @@ async def _send_email_async(to: str, subject: str, body_html: str) -> str:
 
 def _send_email(to: str, subject: str, body_html: str) -> str:
     """
-    Sync bridge around _send_email_async for use in the sync agentic loop.
+    Queue an email for background delivery and return immediately.
 
-    Uses asyncio.run() to call the async Zapier MCP client. Valid because
-    the app runs in a single-worker sync uvicorn context with no outer event loop.
+    The MCP call is a network round-trip the agent doesn't need to wait for:
+    it is scheduled on _email_loop and the agentic loop continues with a
+    "queued" acknowledgement. Delivery outcome is logged by _log_email_result().
     """
-    return asyncio.run(_send_email_async(to, subject, body_html))
+    if not os.environ.get("ZAPIER_MCP_URL"):
+        return "Email could not be sent: ZAPIER_MCP_URL is not configured."
+
+    future = asyncio.run_coroutine_threadsafe(
+        _send_email_async(to, subject, body_html), _email_loop
+    )
+    future.add_done_callback(_log_email_result)
+    logger.info("gmail_send_email queued | to=%s | subject=%s", to, subject)
+    return f"Email queued for delivery to **{to}** with subject: \"{subject}\"."
+
+
+def _log_email_result(future: Future) -> None:
+    """Done-callback for queued emails — surfaces failures that escaped _send_email_async."""
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Queued email failed: %s", exc)
@@ -5,26 +5,33 @@ Run from the backend/ directory:
     uvicorn main:app --reload --port 8000
 
 Endpoints:
-    POST /api/chat   — send a message, receive assistant reply + reasoning trace
-    POST /api/reset  — clear in-memory conversation history
-    GET  /health     — liveness check
+    POST /api/chat        — send a message, receive assistant reply + reasoning trace
+    POST /api/chat/stream — same, as Server-Sent Events: text deltas while the
+                            reply is generated, then a final "done" event
+    POST /api/reset       — clear in-memory conversation history
+    GET  /health          — liveness check
 """
 
+import asyncio
 import logging
 import os
+import time
 from contextlib import asynccontextmanager
 from pathlib import Path
 
+import orjson
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
 # Load .env from repo root (one level above backend/) so that all env vars —
 # including ANTHROPIC_API_KEY and ZAPIER_MCP_URL — are available regardless
 # of which directory uvicorn is launched from.
 load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env")
 
-from agent.executor import run_agent  # noqa: E402
+from agent.executor import run_agent, stream_agent  # noqa: E402
+from agent.tools_impl import close_email_session, open_email_session  # noqa: E402
 from schemas import ChatRequest, ChatResponse, ResetResponse  # noqa: E402
 
 logger = logging.getLogger(__name__)
@@ -36,15 +43,115 @@ logger = logging.getLogger(__name__)
 # ---------------------------------------------------------------------------
 _history: list[dict] = []
 
+# Estimated prompt tokens per _history entry, kept in a parallel list (entries
+# are sent to the API as-is, so they can't carry extra keys), and their sum.
+# Costs are computed once at append time; trimming only subtracts.
+_history_tokens: list[int] = []
+_history_token_sum = 0
+
+# Oldest turns are dropped once the history's estimated size exceeds this
+HISTORY_TOKEN_BUDGET = 8000
+
+# A message identical to the previous one, arriving within this many seconds
+# of its reply, is treated as a client retry and answered from history
+RETRY_WINDOW_SECONDS = 5.0
+_last_reply_at = float("-inf")
+
+# Held for a whole chat turn (and by /api/reset) so concurrent requests can't
+# interleave their appends, rollbacks, and trims on the shared history
+_history_lock = asyncio.Lock()
+
+
+def _estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def _append_history(role: str, content: str) -> None:
+    """Append a message to history, recording its estimated token cost."""
+    global _history_token_sum
+    tokens = _estimate_tokens(content)
+    _history.append({"role": role, "content": content})
+    _history_tokens.append(tokens)
+    _history_token_sum += tokens
+
+
+def _pop_history() -> None:
+    """Remove the most recent message from history."""
+    global _history_token_sum
+    _history.pop()
+    _history_token_sum -= _history_tokens.pop()
+
+
+def _clear_history() -> None:
+    """Remove all messages from history."""
+    global _history_token_sum, _last_reply_at
+    _last_reply_at = float("-inf")
+    _history.clear()
+    _history_tokens.clear()
+    _history_token_sum = 0
+
+
+def _remember_reply(reply: str) -> None:
+    """Append the assistant reply to history and trim it to the token budget."""
+    global _history_token_sum, _last_reply_at
+    _append_history("assistant", reply)
+    _last_reply_at = time.monotonic()
+    # Drop whole user/assistant turns from the front so history still opens
+    # with a user message; the latest turn is always kept
+    drop = 0
+    while _history_token_sum > HISTORY_TOKEN_BUDGET and len(_history) - drop > 2:
+        _history_token_sum -= _history_tokens[drop] + _history_tokens[drop + 1]
+        drop += 2
+    if drop:
+        del _history[:drop]
+        del _history_tokens[:drop]
+
+
+def _log_warmup_result(task: asyncio.Task) -> None:
+    """Done-callback for the background retriever warm-up."""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Policy index warm-up failed: %s", task.exception())
+
+
+def _retried_reply(message: str) -> str | None:
+    """
+    Return the previous reply if `message` repeats the last user message.
+
+    Only applies just after that reply was stored, so a user deliberately
+    sending the same text again later (e.g. "yes" to a new question) still
+    gets a fresh turn. /api/reset always forces one.
+    """
+    if (
+        len(_history) >= 2
+        and _history[-1]["role"] == "assistant"
+        and _history[-2]["content"] == message
+        and time.monotonic() - _last_reply_at < RETRY_WINDOW_SECONDS
+    ):
+        return _history[-1]["content"]
+    return None
+
 
 # ---------------------------------------------------------------------------
-# Lifespan: pre-warm the FAISS retriever so the first /api/chat isn't slow
+# Lifespan: pre-warm the FAISS retriever in the background so the first
+# /api/chat isn't slow, and hold the Zapier MCP email session open for the
+# app's lifetime
 # ---------------------------------------------------------------------------
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Importing retriever triggers module-level index load
-    import rag.retriever  # noqa: F401
+    from rag.retriever import warmup_policy_index
+
+    # Load the embedding model and pay its first-inference cost in a worker
+    # thread, so the server (and /health) is up immediately. A policy question
+    # that arrives first waits on the same load rather than starting another.
+    warmup = asyncio.create_task(asyncio.to_thread(warmup_policy_index))
+    warmup.add_done_callback(_log_warmup_result)
+
+    # Open the Zapier MCP session once, in the background; every send_email
+    # reuses it
+    open_email_session()
     yield
+    await close_email_session()
 
 
 # ---------------------------------------------------------------------------
@@ -73,31 +180,81 @@ def health():
 
 
 @app.post("/api/chat", response_model=ChatResponse)
-def chat(request: ChatRequest) -> ChatResponse:
+async def chat(request: ChatRequest) -> ChatResponse:
     """
     Process a user message through the agent and return the reply.
 
-    Maintains server-side conversation history across turns.
+    Maintains server-side conversation history across turns. A message that
+    repeats the previous one moments after its reply (a client retry) is
+    answered with that reply instead of running the agent again.
     """
-    _history.append({"role": "user", "content": request.message})
+    async with _history_lock:
+        # Client retry of the turn that just finished — skip the agent run
+        retried = _retried_reply(request.message)
+        if retried is not None:
+            return ChatResponse(reply=retried, reasoning=[])
 
-    try:
-        reply, reasoning = run_agent(request.message, _history)
-    except Exception:
-        # Roll back the optimistically-appended user message so history stays clean
-        _history.pop()
-        logger.exception("run_agent failed for message: %.100s", request.message)
-        return ChatResponse(reply="Something went wrong, please try again.", reasoning=[])
+        _append_history("user", request.message)
 
-    _history.append({"role": "assistant", "content": reply})
-    # Keep at most 40 messages (20 turns) to prevent unbounded memory growth
-    _history[:] = _history[-40:]
+        try:
+            reply, reasoning = await run_agent(request.message, _history)
+        except Exception:
+            # Roll back the optimistically-appended user message so history stays clean
+            _pop_history()
+            logger.exception("run_agent failed for message: %.100s", request.message)
+            return ChatResponse(reply="Something went wrong, please try again.", reasoning=[])
+
+        _remember_reply(reply)
 
     return ChatResponse(reply=reply, reasoning=reasoning)
 
 
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """
+    Streaming variant of /api/chat.
+
+    Responds with Server-Sent Events, each a JSON object on a `data:` line:
+        {"type": "text", "text": ...}                    — reply text delta
+        {"type": "tool_start"}                           — tools are running;
+                                                           discard text so far
+        {"type": "done", "reply": ..., "reasoning": [...]} — final event
+        {"type": "error", "reply": ...}                  — agent failure
+    """
+
+    async def events():
+        async with _history_lock:
+            # Client retry of the turn that just finished — skip the agent run
+            retried = _retried_reply(request.message)
+            if retried is not None:
+                done = {"type": "done", "reply": retried, "reasoning": []}
+                yield b"data: " + orjson.dumps(done) + b"\n\n"
+                return
+
+            _append_history("user", request.message)
+            completed = False
+            try:
+                async for event in stream_agent(request.message, _history):
+                    if event["type"] == "done":
+                        _remember_reply(event["reply"])
+                        completed = True
+                    yield b"data: " + orjson.dumps(event) + b"\n\n"
+            except Exception:
+                logger.exception("stream_agent failed for message: %.100s", request.message)
+                error = {"type": "error", "reply": "Something went wrong, please try again."}
+                yield b"data: " + orjson.dumps(error) + b"\n\n"
+            finally:
+                # Roll back the user message if the turn failed or the client
+                # disconnected mid-stream, so history stays clean
+                if not completed:
+                    _pop_history()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @app.post("/api/reset", response_model=ResetResponse)
-def reset() -> ResetResponse:
+async def reset() -> ResetResponse:
     """Clear the in-memory conversation history."""
-    _history.clear()
+    async with _history_lock:
+        _clear_history()
     return ResetResponse(status="ok")
@@ -9,21 +9,28 @@ Note: ChromaDB (originally planned) does not support Python 3.14 due to a
 pydantic v1 dependency. FAISS is used instead, as permitted by PRD §10.
 
 Persistence layout (under backend/rag_store/):
-    index.faiss    — FAISS flat-IP index (L2-normalised vectors → cosine sim)
+    index.faiss    — FAISS HNSW index over 8-bit scalar-quantised vectors,
+                     inner-product metric (L2-normalised vectors → cosine sim)
     metadata.json  — list of chunk metadata dicts, indexed in the same order
-    texts.json     — list of raw chunk texts, indexed in the same order
+    meta.npy       — NumPy record array of the fields the retriever returns
+                     (airline, policy_type, cabin_class and their display
+                     labels), in the same order
+    texts.ndjson   — raw chunk texts, one JSON string per line, in the same order
+    texts_offsets.npy — int64 byte offset of each line in texts.ndjson, plus
+                     the file length, so chunk i is bytes [off[i], off[i+1])
 
 Run from the backend/ directory:
     python -m rag.ingest
 """
 
-import json
 import re
 import uuid
 from pathlib import Path
 
 import faiss
 import numpy as np
+import orjson
+import torch
 from sentence_transformers import SentenceTransformer
 
 # ---------------------------------------------------------------------------
@@ -34,9 +41,27 @@ POLICIES_DIR = BACKEND_DIR / "data" / "policies"
 STORE_DIR = BACKEND_DIR / "rag_store"
 INDEX_PATH = STORE_DIR / "index.faiss"
 META_PATH = STORE_DIR / "metadata.json"
-TEXTS_PATH = STORE_DIR / "texts.json"
+META_ARRAY_PATH = STORE_DIR / "meta.npy"
+
+# Metadata fields copied into meta.npy for the retriever
+META_ARRAY_FIELDS = (
+    "airline", "policy_type", "cabin_class",
+    "airline_label", "policy_type_label", "cabin_class_label",
+)
+TEXTS_PATH = STORE_DIR / "texts.ndjson"
+TEXT_OFFSETS_PATH = STORE_DIR / "texts_offsets.npy"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 
+# HNSW graph parameters: neighbours per node, and candidate-list size while
+# building (higher = better graph, slower one-off build)
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+
+# Texts per encode() forward pass. The default of 32 leaves most of the
+# per-batch overhead unamortised; a GPU (run in FP16) takes larger batches.
+EMBED_BATCH_SIZE_CPU = 256
+EMBED_BATCH_SIZE_GPU = 512
+
 # ---------------------------------------------------------------------------
 # Metadata helpers
 # ---------------------------------------------------------------------------
@@ -63,11 +88,31 @@ CABIN_CLASS_KEYWORDS: list[tuple[list[str], str]] = [
 ]
 
 
+def _compile_keywords(table: list[tuple[list[str], str]]) -> list[tuple[re.Pattern[str], str]]:
+    """Compile each label's keywords into one alternation, keeping label order."""
+    return [
+        (re.compile("|".join(re.escape(kw) for kw in keywords)), label)
+        for keywords, label in table
+    ]
+
+
+# One pattern per label, tried in list order so an earlier label still wins
+# when a heading matches several (a single alternation across all labels
+# would pick whichever keyword appears first in the heading instead)
+_POLICY_TYPE_PATTERNS = _compile_keywords(POLICY_TYPE_KEYWORDS)
+_CABIN_CLASS_PATTERNS = _compile_keywords(CABIN_CLASS_KEYWORDS)
+
+
+def _display_label(value: str) -> str:
+    """Render a snake_case metadata value for display, e.g. "qatar_airways" → "Qatar Airways"."""
+    return value.replace("_", " ").title()
+
+
 def _derive_policy_type(heading: str) -> str:
     """Infer policy_type from a section heading string."""
     lower = heading.lower()
-    for keywords, label in POLICY_TYPE_KEYWORDS:
-        if any(kw in lower for kw in keywords):
+    for pattern, label in _POLICY_TYPE_PATTERNS:
+        if pattern.search(lower):
             return label
     return "general"
 
@@ -75,8 +120,8 @@ def _derive_policy_type(heading: str) -> str:
 def _derive_cabin_class(heading: str) -> str:
     """Infer cabin_class from a section heading string, or 'all' if not specific."""
     lower = heading.lower()
-    for keywords, label in CABIN_CLASS_KEYWORDS:
-        if any(kw in lower for kw in keywords):
+    for pattern, label in _CABIN_CLASS_PATTERNS:
+        if pattern.search(lower):
             return label
     return "all"
 
@@ -85,6 +130,10 @@ def _derive_cabin_class(heading: str) -> str:
 # Chunking
 # ---------------------------------------------------------------------------
 
+# Zero-width split point before every "## " heading line
+_SECTION_SPLIT_RE = re.compile(r"(?=^## .+)", re.MULTILINE)
+
+
 def chunk_markdown(text: str) -> list[tuple[str, str]]:
     """
     Split markdown on ## headings.
@@ -92,8 +141,7 @@ def chunk_markdown(text: str) -> list[tuple[str, str]]:
     Returns a list of (heading, full_chunk_text) tuples where full_chunk_text
     includes the heading line followed by its body paragraphs.
     """
-    pattern = re.compile(r"(?=^## .+)", re.MULTILINE)
-    raw_sections = pattern.split(text)
+    raw_sections = _SECTION_SPLIT_RE.split(text)
 
     chunks: list[tuple[str, str]] = []
     for section in raw_sections:
@@ -107,6 +155,43 @@ def chunk_markdown(text: str) -> list[tuple[str, str]]:
     return chunks
 
 
+# ---------------------------------------------------------------------------
+# Persistence
+# ---------------------------------------------------------------------------
+
+def _write_texts(texts: list[str]) -> None:
+    """
+    Write chunk texts as NDJSON plus a byte-offset table.
+
+    Each text is JSON-encoded onto its own line (embedded newlines are
+    escaped), so the retriever can memory-map the file and decode only the
+    lines FAISS returns instead of parsing every chunk up front.
+    """
+    lines = [orjson.dumps(text) + b"\n" for text in texts]
+    offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+    np.cumsum([len(line) for line in lines], out=offsets[1:])
+    TEXTS_PATH.write_bytes(b"".join(lines))
+    np.save(TEXT_OFFSETS_PATH, offsets)
+
+
+def _write_meta_array(all_meta: list[dict]) -> None:
+    """
+    Write the retriever-facing metadata fields as a NumPy record array.
+
+    Each field is a fixed-width unicode column sized to its longest value, so
+    a hit's labels are one row view instead of a parsed dict per chunk.
+    """
+    dtype = [
+        (field, f"U{max((len(m[field]) for m in all_meta), default=1)}")
+        for field in META_ARRAY_FIELDS
+    ]
+    records = np.array(
+        [tuple(m[field] for field in META_ARRAY_FIELDS) for m in all_meta],
+        dtype=dtype,
+    )
+    np.save(META_ARRAY_PATH, records)
+
+
 # ---------------------------------------------------------------------------
 # Main ingestion
 # ---------------------------------------------------------------------------
@@ -116,6 +201,11 @@ def ingest() -> None:
 
     print(f"Loading embedding model: {EMBEDDING_MODEL}")
     model = SentenceTransformer(EMBEDDING_MODEL)
+    if torch.cuda.is_available():
+        model = model.to("cuda").half()
+        batch_size = EMBED_BATCH_SIZE_GPU
+    else:
+        batch_size = EMBED_BATCH_SIZE_CPU
 
     STORE_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -134,12 +224,18 @@ def ingest() -> None:
         chunks = chunk_markdown(text)
 
         for heading, chunk_text in chunks:
+            policy_type = _derive_policy_type(heading)
+            cabin_class = _derive_cabin_class(heading)
             all_texts.append(chunk_text)
             all_meta.append({
                 "id": str(uuid.uuid4()),
                 "airline": airline,
-                "policy_type": _derive_policy_type(heading),
-                "cabin_class": _derive_cabin_class(heading),
+                "policy_type": policy_type,
+                "cabin_class": cabin_class,
+                # Display forms, rendered once here rather than per query
+                "airline_label": _display_label(airline),
+                "policy_type_label": _display_label(policy_type),
+                "cabin_class_label": _display_label(cabin_class),
                 "source_file": md_path.name,
                 "heading": heading,
             })
@@ -149,22 +245,34 @@ def ingest() -> None:
     print(f"\nEmbedding {len(all_texts)} chunks...")
     embeddings = model.encode(
         all_texts,
+        batch_size=batch_size,
         show_progress_bar=True,
         normalize_embeddings=True,   # L2-norm → inner product == cosine similarity
+        convert_to_numpy=True,
     )
 
     dim = embeddings.shape[1]
-    index = faiss.IndexFlatIP(dim)           # inner product index
-    index.add(embeddings.astype(np.float32))  # type: ignore[arg-type]
+    # FAISS expects float32 — this also widens FP16 output from a GPU run
+    vectors = embeddings.astype(np.float32)
+    # HNSW graph index: approximate search in ~log(N) instead of a full scan.
+    # Vectors are stored as 8-bit scalar codes (a quarter of the float32 size);
+    # train() learns each dimension's value range for the quantiser.
+    index = faiss.IndexHNSWSQ(
+        dim, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT
+    )
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    index.train(vectors)  # type: ignore[arg-type]
+    index.add(vectors)  # type: ignore[arg-type]
 
     faiss.write_index(index, str(INDEX_PATH))
-    META_PATH.write_text(json.dumps(all_meta, indent=2), encoding="utf-8")
-    TEXTS_PATH.write_text(json.dumps(all_texts, indent=2), encoding="utf-8")
+    META_PATH.write_bytes(orjson.dumps(all_meta, option=orjson.OPT_INDENT_2))
+    _write_meta_array(all_meta)
+    _write_texts(all_texts)
 
     print(f"\nDone.")
     print(f"  Index  → {INDEX_PATH}")
-    print(f"  Meta   → {META_PATH}")
-    print(f"  Texts  → {TEXTS_PATH}")
+    print(f"  Meta   → {META_PATH} (+ {META_ARRAY_PATH.name})")
+    print(f"  Texts  → {TEXTS_PATH} (+ {TEXT_OFFSETS_PATH.name})")
     print(f"  Total chunks: {len(all_meta)}")
 
 
@@ -1,48 +1,188 @@
 """
 RAG retrieval interface for airline policy queries.
 
-Loads the persisted FAISS index, metadata, and texts once on module import,
-then exposes a single query_policy() function used by the rag_lookup agent
-tool (ABA-6).
+Loads the persisted FAISS index and chunk labels once on module import, and
+memory-maps the chunk texts so only the lines for returned hits are read and
+decoded. The embedding model is loaded lazily, on the first query, so importing
+this module stays cheap. The rag_store/ files must exist at import time —
+importing this module raises RuntimeError otherwise.
+
+query_policy() serves the rag_lookup agent tool (ABA-6); query_policy_batch()
+embeds and searches several questions in one pass.
+
+Results are cached in-process (LRU with a TTL) keyed on the normalised
+question and n_results, so repeated policy questions skip the embedding
+forward pass and FAISS search. query_policy.cache_clear() empties the cache.
+
+warmup_policy_index() loads the model and runs one throwaway query so that the
+first real policy question doesn't pay the load and first-inference cost;
+main.py runs it in a background thread during FastAPI startup, so /health
+answers while it is still loading.
 
 Run from the backend/ directory for a smoke-test:
     python -m rag.retriever
 """
 
-import json
 import logging
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
+import orjson
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
-# Config (must match ingest.py)
+# Config (paths and EMBEDDING_MODEL must match ingest.py)
 # ---------------------------------------------------------------------------
 BACKEND_DIR = Path(__file__).parent.parent
 STORE_DIR = BACKEND_DIR / "rag_store"
 INDEX_PATH = STORE_DIR / "index.faiss"
-META_PATH = STORE_DIR / "metadata.json"
-TEXTS_PATH = STORE_DIR / "texts.json"
+META_ARRAY_PATH = STORE_DIR / "meta.npy"
+TEXTS_PATH = STORE_DIR / "texts.ndjson"
+TEXT_OFFSETS_PATH = STORE_DIR / "texts_offsets.npy"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 
+# Query-time encoder: the int8-quantised ONNX export that ships in the model's
+# Hub repo, run by ONNX Runtime on CPU. It produces the same normalised
+# (1, 384) float32 vectors as the FP32 PyTorch model used by ingest.py, with a
+# small recall cost, at a fraction of the per-query latency. Use the
+# "_qint8_avx512_vnni" / "_qint8_arm64" file on hardware that supports it.
+EMBEDDING_BACKEND = "onnx"
+EMBEDDING_ONNX_FILE = "onnx/model_quint8_avx2.onnx"
+
+# HNSW candidate-list size at query time (recall/latency trade-off; must be
+# at least n_results)
+HNSW_EF_SEARCH = 64
+
+# FAISS OpenMP threads. Live requests search one vector at a time, where
+# spinning up a thread team per call costs more than it saves and competes
+# with the server's own threads, so searches are single-threaded by default.
+# query_policy_batch() raises this for multi-vector searches only. The setting
+# is process-wide, so a single query that overlaps a batch may briefly run
+# with the batch's threads; that only affects its latency, not its results.
+FAISS_THREADS = 1
+FAISS_BATCH_THREADS = min(4, os.cpu_count() or 1)
+
+# Query result cache sizing
+CACHE_MAX_SIZE = 512
+CACHE_TTL_SECONDS = 300.0
+
 # ---------------------------------------------------------------------------
 # Module-level singletons — loaded once, reused across all requests
 # ---------------------------------------------------------------------------
+faiss.omp_set_num_threads(FAISS_THREADS)
+
 try:
-    _model = SentenceTransformer(EMBEDDING_MODEL)
     _index = faiss.read_index(str(INDEX_PATH))
-    _metadata: list[dict] = json.loads(META_PATH.read_text(encoding="utf-8"))
-    _texts: list[str] = json.loads(TEXTS_PATH.read_text(encoding="utf-8"))
+    _index.hnsw.efSearch = HNSW_EF_SEARCH
+    # Record array with airline / policy_type / cabin_class columns and their
+    # *_label display forms, one row per chunk (metadata.json keeps the full
+    # records but isn't loaded here)
+    _meta: np.ndarray = np.load(META_ARRAY_PATH)
+    # Chunk i's JSON-encoded text is _texts_mm[_text_offsets[i]:_text_offsets[i + 1]]
+    _text_offsets: np.ndarray = np.load(TEXT_OFFSETS_PATH)
+    with open(TEXTS_PATH, "rb") as texts_file:
+        _texts_mm = mmap.mmap(texts_file.fileno(), 0, access=mmap.ACCESS_READ)
 except FileNotFoundError as exc:
     raise RuntimeError(
         f"RAG store not found ({exc.filename}). Run: python -m rag.ingest"
     ) from exc
 
 
+# Embedding model — loaded by the first _get_model() call, not at import
+_model: "SentenceTransformer | None" = None
+_model_lock = threading.Lock()
+
+
+def _get_model() -> "SentenceTransformer":
+    """
+    Return the query encoder, loading it on first use.
+
+    Concurrent first callers block on the lock until the one load finishes.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+
+                _model = SentenceTransformer(
+                    EMBEDDING_MODEL,
+                    backend=EMBEDDING_BACKEND,
+                    model_kwargs={"file_name": EMBEDDING_ONNX_FILE},
+                )
+    return _model
+
+
+def _chunk_text(idx: int) -> str:
+    """Decode one chunk's text from the memory-mapped texts file."""
+    return orjson.loads(_texts_mm[_text_offsets[idx]:_text_offsets[idx + 1]])
+
+
+# ---------------------------------------------------------------------------
+# Query cache
+# ---------------------------------------------------------------------------
+
+class QueryCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL.
+
+    Entries are evicted least-recently-used first once max_size is reached,
+    and treated as missing once older than ttl seconds. Query results are
+    returned as fresh copies so callers can't mutate the cached entry.
+    """
+
+    def __init__(self, max_size: int = CACHE_MAX_SIZE, ttl: float = CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict[tuple, tuple[float, list[dict]]] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key: tuple) -> list[dict] | None:
+        """Return the cached results for key, or None on a miss or expiry."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, results = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return [dict(chunk) for chunk in results]
+
+    def put(self, key: tuple, results: list[dict]) -> None:
+        """Store results under key, evicting the least-recently-used entry if full."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, [dict(chunk) for chunk in results])
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+
+_cache = QueryCache()
+
+
+def _cache_key(question: str, n_results: int) -> tuple[str, int]:
+    """Normalise case and whitespace so trivially different phrasings share an entry."""
+    return " ".join(question.split()).lower(), n_results
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
@@ -61,25 +201,79 @@ def query_policy(question: str, n_results: int = 3) -> list[dict]:
             - airline     (str)   e.g. "emirates"
             - policy_type (str)   e.g. "baggage" | "cancellation" | "check_in"
             - cabin_class (str)   e.g. "economy" | "business" | "first" | "all"
+            - airline_label, policy_type_label, cabin_class_label
+                          (str)   display forms, e.g. "Qatar Airways", "Check In"
             - score       (float) cosine similarity score (higher = more relevant)
     """
-    query_vec = _model.encode([question], normalize_embeddings=True).astype(np.float32)
-    scores, indices = _index.search(query_vec, n_results)
-
-    chunks: list[dict] = []
-    for score, idx in zip(scores[0], indices[0]):
-        if idx == -1:           # FAISS returns -1 for missing results
-            continue
-        meta = _metadata[idx]
-        chunks.append({
-            "text": _texts[idx],
-            "airline": meta.get("airline", "unknown"),
-            "policy_type": meta.get("policy_type", "general"),
-            "cabin_class": meta.get("cabin_class", "all"),
-            "score": round(float(score), 4),
-        })
-
-    return chunks
+    return query_policy_batch([question], n_results)[0]
+
+
+def query_policy_batch(questions: list[str], n_results: int = 3) -> list[list[dict]]:
+    """
+    Retrieve the top-k policy chunks for several questions at once.
+
+    Questions not already cached are embedded in one encode() call and looked
+    up with one FAISS search, rather than one forward pass and search each.
+
+    Args:
+        questions: Natural-language policy questions.
+        n_results: Number of chunks to return per question (default 3).
+
+    Returns:
+        One result list per question, in the same order, each as returned by
+        query_policy().
+    """
+    keys = [_cache_key(question, n_results) for question in questions]
+    results: list[list[dict] | None] = [_cache.get(key) for key in keys]
+
+    # Distinct uncached questions (by cache key) → first question text seen
+    misses: dict[tuple[str, int], str] = {}
+    for key, question, cached in zip(keys, questions, results):
+        if cached is None:
+            misses.setdefault(key, question)
+
+    if misses:
+        query_vecs = _get_model().encode(
+            list(misses.values()), normalize_embeddings=True
+        ).astype(np.float32)
+        if len(query_vecs) > 1:
+            faiss.omp_set_num_threads(FAISS_BATCH_THREADS)
+            try:
+                scores, indices = _index.search(query_vecs, n_results)
+            finally:
+                faiss.omp_set_num_threads(FAISS_THREADS)
+        else:
+            scores, indices = _index.search(query_vecs, n_results)
+
+        fetched: dict[tuple[str, int], list[dict]] = {}
+        for key, row_scores, row_indices in zip(misses, scores, indices):
+            chunks: list[dict] = []
+            for score, idx in zip(row_scores, row_indices):
+                if idx == -1:           # FAISS returns -1 for missing results
+                    continue
+                chunks.append({
+                    "text": _chunk_text(idx),
+                    **dict(zip(_meta.dtype.names, _meta[idx].tolist())),
+                    "score": round(float(score), 4),
+                })
+            _cache.put(key, chunks)
+            fetched[key] = chunks
+
+        # Each caller gets its own copy, as with cache hits
+        results = [
+            cached if cached is not None else [dict(chunk) for chunk in fetched[key]]
+            for key, cached in zip(keys, results)
+        ]
+
+    return results  # type: ignore[return-value]
+
+
+query_policy.cache_clear = _cache.clear  # type: ignore[attr-defined]
+
+
+def warmup_policy_index() -> None:
+    """Load the embedding model and run a throwaway query to warm it and the FAISS index."""
+    query_policy("baggage allowance", n_results=1)
 
 
 # ---------------------------------------------------------------------------
@@ -28,37 +28,88 @@ export default function App() {
   const [loading, setLoading] = useState(false)
 
   /**
-   * Send a user message to the backend and append the assistant reply.
+   * Send a user message to the backend and stream the assistant reply.
    * The server maintains its own conversation history; we only track
    * the display-level messages locally for rendering.
+   *
+   * /api/chat/stream responds with Server-Sent Events: "text" deltas are
+   * appended to the assistant bubble as they arrive, a "tool_start" event
+   * clears that text (it was a preamble to a tool call) and brings the loading
+   * indicator back while tools run, and the final "done" event replaces the
+   * bubble with the complete reply and delivers the reasoning trace.
    */
   async function handleSubmit(text) {
     const trimmed = text.trim()
     if (!trimmed || loading) return
 
     // Optimistically append the user message with a stable ID
-    setMessages(prev => [...prev, { id: crypto.randomUUID(), role: 'user', content: trimmed }])
+    const userId = crypto.randomUUID()
+    const assistantId = crypto.randomUUID()
+    setMessages(prev => [...prev, { id: userId, role: 'user', content: trimmed }])
     setLoading(true)
 
+    // Create the assistant bubble on the first delta, then update it in place
+    let streamed = ''
+    function showAssistant(content) {
+      setMessages(prev =>
+        prev.some(m => m.id === assistantId)
+          ? prev.map(m => (m.id === assistantId ? { ...m, content } : m))
+          : [...prev, { id: assistantId, role: 'assistant', content }]
+      )
+    }
+
     try {
-      const res = await fetch('/api/chat', {
+      const res = await fetch('/api/chat/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ message: trimmed }),
       })
 
-      if (!res.ok) {
+      if (!res.ok || !res.body) {
         throw new Error(`Server error: ${res.status}`)
       }
 
-      const data = await res.json()
-      setMessages(prev => [...prev, { id: crypto.randomUUID(), role: 'assistant', content: data.reply }])
-      setReasoning(data.reasoning ?? [])
+      const reader = res.body.pipeThrough(new TextDecoderStream()).getReader()
+      let buffer = ''
+      let finished = false
+      while (!finished) {
+        const { value, done } = await reader.read()
+        if (done) break
+        buffer += value
+
+        // SSE events are separated by a blank line; keep any partial tail
+        const rawEvents = buffer.split('\n\n')
+        buffer = rawEvents.pop()
+        for (const raw of rawEvents) {
+          if (!raw.startsWith('data: ')) continue
+          const event = JSON.parse(raw.slice('data: '.length))
+
+          if (event.type === 'text') {
+            streamed += event.text
+            showAssistant(streamed)
+          } else if (event.type === 'tool_start') {
+            // The reply is generated after the tools return — drop the
+            // preamble so the loading indicator shows until it starts
+            streamed = ''
+            setMessages(prev => prev.filter(m => m.id !== assistantId))
+          } else if (event.type === 'done') {
+            showAssistant(event.reply)
+            setReasoning(event.reasoning ?? [])
+            finished = true
+          } else if (event.type === 'error') {
+            throw new Error(event.reply)
+          }
+        }
+      }
+
+      if (!finished) {
+        throw new Error('Stream ended before the reply completed')
+      }
     } catch (err) {
-      // Remove the optimistically-added user message before showing the error
-      // so the chat doesn't show an orphaned user bubble paired with an error reply.
+      // Remove the optimistically-added user message (and any partial reply)
+      // before showing the error so the chat doesn't show an orphaned user bubble.
       setMessages(prev => [
-        ...prev.slice(0, -1),
+        ...prev.filter(m => m.id !== userId && m.id !== assistantId),
         { id: crypto.randomUUID(), role: 'assistant', content: '⚠️ Something went wrong. Please try again.' },
       ])
     } finally {
@@ -8,7 +8,7 @@
  *
  * Props:
  *   messages  — { role: "user"|"assistant", content: string }[]
- *   loading   — bool, true while awaiting API response
+ *   loading   — bool, true while awaiting / streaming the API response
  *   onSubmit  — (text: string) => void
  */
 
@@ -127,8 +127,8 @@ export default function ChatWindow({ messages, loading, onSubmit, onReset }) {
           </div>
         ))}
 
-        {/* Loading indicator */}
-        {loading && (
+        {/* Loading indicator — hidden while reply text is streaming */}
+        {loading && messages[messages.length - 1]?.role !== 'assistant' && (
           <div className="message-row assistant">
             <div className="bubble assistant loading-bubble">
               <span className="dot" /><span className="dot" /><span className="dot" />